@@ -1,10 +1,13 @@
 import datetime
 import logging
 import mailbox
+import os
 
 import numpy as np
 import pandas as pd
-import pytz
+import pyarrow as pa
+import pyarrow.csv
+import scipy.sparse
 
 import bigbang.process as process
 from bigbang.thread import Node, Thread
@@ -12,12 +15,98 @@ from config.config import CONFIG
 
 from . import mailman, utils
 
+# Date formats that are tried, in order, before falling back to pandas'
+# format inference: the ISO formats written to csv by pandas and by
+# Archive.save and the RFC 2822 format of raw email Date headers.
+DATE_FORMATS = [
+    "%Y-%m-%d %H:%M:%S%z",
+    "%Y-%m-%d %H:%M:%S.%f%z",
+    "%a, %d %b %Y %H:%M:%S %z",
+]
+
+# columns of message headers that are stored as arrow backed strings
+STRING_COLUMNS = ["From", "In-Reply-To", "References"]
+
+# proleptic Gregorian ordinal of the unix epoch, see datetime.toordinal
+EPOCH_ORDINAL = datetime.date(1970, 1, 1).toordinal()
+
 
 def load(path):
-    data = pd.read_csv(path)
+    """
+    Load an Archive saved with Archive.save.
+
+    The file format is derived from the extension of *path*: .parquet and
+    .h5/.hdf5 files keep the column types, everything else is read as csv.
+    """
+    path = os.fspath(path)
+    if path.endswith(".parquet"):
+        data = pd.read_parquet(path)
+    elif path.endswith((".h5", ".hdf5")):
+        data = pd.read_hdf(path, key="df")
+    else:
+        try:
+            data = _read_csv_arrow(path)
+        except (pa.ArrowInvalid, UnicodeDecodeError):
+            # e.g. an archive saved with an encoding other than utf-8
+            data = pd.read_csv(path)
     return Archive(data)
 
 
+def _read_csv_arrow(path):
+    """
+    Read a csv file with pyarrow, parsing the dates while reading.
+
+    Dates that match none of the parsers leave the Date column as strings,
+    which are then parsed by Archive.
+    """
+    table = pyarrow.csv.read_csv(
+        path,
+        parse_options=pyarrow.csv.ParseOptions(newlines_in_values=True),
+        convert_options=pyarrow.csv.ConvertOptions(
+            timestamp_parsers=[pyarrow.csv.ISO8601, DATE_FORMATS[-1]],
+            # empty cells are missing values, as with pd.read_csv
+            null_values=[""],
+            strings_can_be_null=True,
+        ),
+    )
+    return table.to_pandas()
+
+
+def _now_utc():
+    """Return the current time as a timezone aware UTC timestamp."""
+    return pd.Timestamp.now(tz="UTC")
+
+
+def to_utc_datetime(dates):
+    """
+    Convert a Series of dates into timezone aware UTC datetimes.
+
+    Parsing with an explicit format keeps pandas on its compiled fast path,
+    so each of the DATE_FORMATS is tried first and only the dates matching
+    none of them are handed to the (much slower) format inference.
+    Dates that can not be parsed at all become NaT.
+    """
+    if isinstance(dates.dtype, pd.DatetimeTZDtype):
+        # e.g. loaded from parquet or hdf5, nothing to parse
+        return dates.dt.tz_convert("UTC")
+
+    parsed = pd.to_datetime(
+        dates, format=DATE_FORMATS[0], errors="coerce", utc=True
+    )
+    for fmt in DATE_FORMATS[1:] + [None]:
+        missing = parsed.isnull() & dates.notnull()
+        if not missing.any():
+            break
+        parsed[missing] = pd.to_datetime(
+            dates[missing],
+            format=fmt,
+            errors="coerce",
+            infer_datetime_format=fmt is None,
+            utc=True,
+        )
+    return parsed
+
+
 class ArchiveWarning(BaseException):
     """Base class for Archive class specific exceptions"""
 
@@ -29,6 +118,7 @@ class Archive(object):
 
     data = None
     activity = None
+    activity_sparse = None
     threads = None
     entities = None
 
@@ -49,8 +139,8 @@ class Archive(object):
         else to a directory of .mbox files (also in .mbox format). Note that
         the file extensions need not be .mbox; frequently they will be .txt.
 
-        Upon initialization, the Archive object drops duplicate entries
-        and sorts its member variable *data* by Date.
+        Upon initialization, the Archive object drops entries with a
+        duplicate Message-ID and sorts its member variable *data* by Date.
         """
 
         if isinstance(data, pd.core.frame.DataFrame):
@@ -61,12 +151,7 @@ class Archive(object):
             )
 
         try:
-            self.data["Date"] = pd.to_datetime(
-                self.data["Date"],
-                errors="coerce",
-                infer_datetime_format=True,
-                utc=True,
-            )
+            self.data["Date"] = to_utc_datetime(self.data["Date"])
         except Exception as e:
             logging.error(
                 "Error while converting to datetime, despite coerce mode. "
@@ -78,7 +163,15 @@ class Archive(object):
             )
 
         try:
-            self.data.drop_duplicates(inplace=True)
+            # a message is identified by its Message-ID, which is either a
+            # column or already the index. Messages without one are kept.
+            if "Message-ID" in self.data.columns:
+                message_ids = pd.Index(self.data["Message-ID"])
+            else:
+                message_ids = self.data.index
+            duplicated = message_ids.duplicated() & message_ids.notnull()
+            if duplicated.any():
+                self.data = self.data[~duplicated]
         except Exception as e:
             logging.error(
                 "Error while removing duplicate messages, maybe timezone issues?"
@@ -95,7 +188,15 @@ class Archive(object):
             # workaround for https://github.com/pandas-dev/pandas/issues/13407
 
         # convert any null fields to None -- csv saves these as nan sometimes
-        self.data = self.data.where(pd.notnull(self.data), None)
+        for col in self.data.select_dtypes(include="object").columns:
+            self.data[col] = self.data[col].where(
+                self.data[col].notnull(), None
+            )
+
+        # arrow strings are more compact than python objects and are
+        # hashed without touching python, e.g. when grouping by sender
+        for col in self.data.columns.intersection(STRING_COLUMNS):
+            self.data[col] = self.data[col].astype("string[pyarrow]")
 
         try:
             # set the index to be the Message-ID column
@@ -104,23 +205,19 @@ class Archive(object):
             # will get KeyError if Message-ID is already index
             pass
 
-        # let's do a pass to try to find bad tzinfo's
-        bad_indices = []
-        for i, row in self.data.iterrows():
-            try:
-                row["Date"] < datetime.datetime.now(pytz.utc)
-            except Exception as e:
-                logging.error(
-                    "Error timezone issues while detecting bad rows. "
-                    + f"The error message is: {e}",
-                    exc_info=True,
-                )
-                bad_indices.append(i)
-                logging.info("Bad timezone on %s", row["Date"])
-        if len(bad_indices) > 0:
-            # drop those rows that threw an error
-            self.data = self.data.drop(bad_indices)
-            logging.info("Dropped %d rows", len(bad_indices))
+        # bring all dates to UTC in a single vectorized conversion; dates
+        # with bad tzinfo's end up as NaT
+        dates = self.data["Date"]
+        if dates.dt.tz is None:
+            dates = dates.dt.tz_localize("UTC")
+        else:
+            dates = dates.dt.tz_convert("UTC")
+        self.data["Date"] = dates
+        bad = dates.isnull()
+        if bad.any():
+            # drop those rows with bad dates
+            self.data = self.data[~bad]
+            logging.info("Dropped %d rows", bad.sum())
 
         try:
             self.data.sort_values(by="Date", inplace=True)
@@ -144,27 +241,29 @@ class Archive(object):
 
             self.entities = process.resolve_sender_entities(self.activity)
 
-        to_replace = []
+        mapping = {n: e for e, names in self.entities.items() for n in names}
 
-        value = []
+        # only the sender column holds entity names, so leave the other
+        # columns (in particular the bodies) untouched
+        senders = self.data["From"]
+        resolved = senders.map(mapping).fillna(senders).astype(senders.dtype)
 
-        for e, names in list(self.entities.items()):
-            for n in names:
-                to_replace.append(n)
-                value.append(e)
+        if not inplace:
+            return self.data.assign(From=resolved)
 
-        data = self.data.replace(
-            to_replace=to_replace, value=value, inplace=inplace
-        )
+        self.data["From"] = resolved
 
-        # clear and replace activity with resolved activity
-        self.activity = None
-        self.get_activity()
+        # merge the activity of the senders of each entity instead of
+        # recomputing the activity matrix from the messages
+        if self.activity is not None:
+            self.activity = (
+                self.activity.T.groupby(lambda n: mapping.get(n, n))
+                .sum()
+                .T.rename_axis(columns="From")
+            )
+        self.activity_sparse = None
 
-        if inplace:
-            return self.data
-        else:
-            return data
+        return self.data
 
     def get_activity(self, resolved=False):
         """
@@ -188,8 +287,50 @@ class Archive(object):
 
         return self.activity
 
+    def get_activity_sparse(self):
+        """
+        Get the activity matrix of an Archive as a sparse DataFrame.
+
+        Same labels as get_activity, but only the nonzero cells are stored,
+        which for large archives with many senders is a small fraction.
+        """
+        if self.activity_sparse is None:
+            self.activity_sparse = self.compute_activity_sparse()
+        return self.activity_sparse
+
     def compute_activity(self, clean=True):
         """Return the computed activity."""
+        dates, senders, date_codes, sender_codes = _activity_codes(
+            self._activity_messages(clean)
+        )
+
+        # scatter-add every message into a preallocated matrix
+        matrix = np.zeros((len(dates), len(senders)), dtype="int64")
+        np.add.at(matrix, (date_codes, sender_codes), 1)
+
+        return pd.DataFrame(matrix, index=dates, columns=senders)
+
+    def compute_activity_sparse(self, clean=True):
+        """Return the computed activity as a sparse DataFrame."""
+        dates, senders, date_codes, sender_codes = _activity_codes(
+            self._activity_messages(clean)
+        )
+
+        # duplicate (date, sender) entries are summed up by scipy
+        matrix = scipy.sparse.coo_matrix(
+            (
+                np.ones(len(date_codes), dtype="int64"),
+                (date_codes, sender_codes),
+            ),
+            shape=(len(dates), len(senders)),
+        ).tocsr()
+
+        return pd.DataFrame.sparse.from_spmatrix(
+            matrix, index=dates, columns=senders
+        )
+
+    def _activity_messages(self, clean=True):
+        """Return the messages counted in the activity matrix."""
         mdf = self.data
 
         if clean:
@@ -197,21 +338,11 @@ class Archive(object):
             if mdf["Date"].isnull().any():
                 mdf = mdf.dropna(subset=["Date"])
 
-            mdf = mdf[
-                mdf["Date"] < datetime.datetime.now(pytz.utc)
-            ]  # drop messages apparently in the future
+            # drop messages apparently in the future
+            now = _now_utc()
+            mdf = mdf[mdf["Date"] < now]
 
-        mdf2 = mdf.reindex(columns=["From", "Date"])
-        mdf2["Date"] = mdf["Date"].apply(lambda x: x.toordinal())
-
-        activity = (
-            mdf2.groupby(["From", "Date"]).size().unstack("From").fillna(0)
-        )
-        new_date_range = np.arange(mdf2["Date"].min(), mdf2["Date"].max())
-        # activity.set_index('Date')
-        activity = activity.reindex(new_date_range, fill_value=0)
-
-        return activity
+        return mdf
 
     def get_threads(self, verbose=False):
         """Get threads."""
@@ -227,37 +358,99 @@ class Archive(object):
         total = df.shape[0]
         c = 0
 
-        for i in df.iterrows():
+        # iterating over plain arrays and dicts is much cheaper than
+        # materializing a Series for every row with iterrows
+        rows = zip(
+            df.index.to_numpy(),
+            df["In-Reply-To"].to_numpy(dtype=object, na_value=None),
+            df.to_dict("records"),
+        )
+
+        for message_id, reply_to, row in rows:
 
             if verbose:
                 c += 1
                 if c % 1000 == 0:
                     print("Processed %d of %d" % (c, total))
 
-            if i[1]["In-Reply-To"] == "None":
-                root = Node(i[0], i[1])
-                visited[i[0]] = root
+            if reply_to == "None":
+                root = Node(message_id, row)
+                visited[message_id] = root
                 threads.append(Thread(root))
-            elif i[1]["In-Reply-To"] not in list(visited.keys()):
-                root = Node(i[1]["In-Reply-To"])
-                succ = Node(i[0], i[1], root)
+            elif reply_to not in visited:
+                root = Node(reply_to)
+                succ = Node(message_id, row, root)
                 root.add_successor(succ)
-                visited[i[1]["In-Reply-To"]] = root
-                visited[i[0]] = succ
+                visited[reply_to] = root
+                visited[message_id] = succ
                 threads.append(Thread(root, known_root=False))
             else:
-                parent = visited[i[1]["In-Reply-To"]]
-                node = Node(i[0], i[1], parent)
+                parent = visited[reply_to]
+                node = Node(message_id, row, parent)
                 parent.add_successor(node)
-                visited[i[0]] = node
+                visited[message_id] = node
 
         self.threads = threads
 
         return threads
 
     def save(self, path, encoding="utf-8"):
-        """Save data to csv file."""
-        self.data.to_csv(path, ",", encoding=encoding)
+        """
+        Save data to a file.
+
+        The file format is derived from the extension of *path*. Parquet
+        (.parquet) and HDF5 (.h5/.hdf5) files store the parsed dates, which
+        makes them much faster to load again than csv, the default.
+        HDF5 requires the optional dependency pytables.
+        """
+        path = os.fspath(path)
+        if path.endswith(".parquet"):
+            self.data.to_parquet(path, compression="zstd")
+        elif path.endswith((".h5", ".hdf5")):
+            # pytables does not know about arrow strings
+            strings = self.data.select_dtypes(include="string").columns
+            self.data.astype({col: object for col in strings}).to_hdf(
+                path, key="df", complib="blosc:zstd", complevel=5
+            )
+        elif encoding.lower().replace("-", "") == "utf8":
+            try:
+                table = pa.Table.from_pandas(
+                    self.data.reset_index(), preserve_index=False
+                )
+            except (pa.ArrowInvalid, pa.ArrowTypeError):
+                # e.g. a column mixing numbers and strings
+                self.data.to_csv(path, ",", encoding=encoding)
+            else:
+                # arrow formats the cells in C++ instead of per cell in python
+                pyarrow.csv.write_csv(table, path)
+        else:
+            self.data.to_csv(path, ",", encoding=encoding)
+
+
+def _activity_codes(mdf):
+    """
+    Factorize the senders and days of the messages in *mdf*.
+
+    Returns the ordinal dates and senders labelling the activity matrix,
+    followed by the row and column of each message in it.
+    Messages without a sender are left out.
+    """
+    mdf = mdf[mdf["From"].notnull()]
+    # days since the epoch (in UTC) shifted to ordinals, computed on the
+    # whole datetime64 array instead of calling toordinal() per message
+    ordinals = (
+        mdf["Date"].values.astype("datetime64[D]").astype("int64")
+        + EPOCH_ORDINAL
+    )
+    # hash every distinct sender once and work on the integer codes of the
+    # categorical from there on; only the observed senders are kept
+    senders = mdf["From"].astype("category").cat.remove_unused_categories()
+    sender_codes = senders.cat.codes.to_numpy()
+    senders = pd.Index(senders.cat.categories, dtype=object, name="From")
+
+    first, last = ordinals.min(), ordinals.max()
+    dates = pd.Index(np.arange(first, last + 1), name="Date")
+    return dates, senders, ordinals - first, sender_codes
 
 
 def find_footer(messages, number=1):
@@ -271,34 +464,18 @@ def find_footer(messages, number=1):
         messages = messages["Body"]
 
     # sort in lexical order of reverse strings to maximize foot length
-    srb = messages.apply(lambda x: None if x is None else x[::-1]).order()
-    # srb = df.apply(lambda x: None if x['Body'] is None else x['Body'][::-1],
-    #              axis=1).order()
-    # begin walking down the series looking for maximal overlap
-    counts = {}
+    srb = messages.dropna().map(lambda x: x[::-1]).sort_values().to_numpy()
 
-    last = None
+    # walk down the sorted bodies looking for maximal overlap of neighbours
+    counts = {}
 
     def clean_footer(foot):
         return foot.strip()
 
-    for b in srb:
-        if last is None:
-            last = b
-            continue
-        elif b is None:
-            continue
-        else:
-            head, i = utils.get_common_head(b, last, delimiter="\n")
-            head = clean_footer(head[::-1])
-            last = b
-
-            if head in counts:
-                counts[head] = counts[head] + 1
-            else:
-                counts[head] = 1
-
-        last = b
+    for last, b in zip(srb[:-1], srb[1:]):
+        head, i = utils.get_common_head(b, last, delimiter="\n")
+        head = clean_footer(head[::-1])
+        counts[head] = counts.get(head, 0) + 1
 
     # reduce candidates that are strictly longer and less frequent
     # than most promising footer candidates
@@ -63,7 +63,7 @@ def messages_to_interaction_graph(messages, verbose=False, clean=True):
     for sender, count in list(sender_counts.items()):
         IG.nodes[sender]["sent"] = count
 
-    replies = [m for m in df.iterrows() if m[1]["In-Reply-To"] is not None]
+    replies = [m for m in df.iterrows() if pandas.notna(m[1]["In-Reply-To"])]
 
     for m in replies:
         m_from = m[1]["From"]
@@ -1,13 +1,22 @@
+import atexit
 import datetime
 import email
 import email.parser
+import email.utils
+import functools
 import glob
+import html
+import itertools
 import logging
 import mailbox
 import os
 import re
+import sqlite3
+import string
 import subprocess
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from urllib.parse import urlparse
 from urllib.parse import urljoin
 import warnings
@@ -15,13 +24,17 @@ from email.header import Header
 from email.message import Message
 from email.mime.text import MIMEText
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple, Union
+from typing import Callable, Dict, List, Optional, Tuple, Union
 
-import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 import requests
 import yaml
-from bs4 import BeautifulSoup
+import lxml.html
+from lxml.etree import HTMLPullParser, LxmlError, ParserError, XPath
+from lxml.html import soupparser
+from urllib3.util.retry import Retry
 
 from config.config import CONFIG
 
@@ -34,21 +47,57 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# patterns that are matched for every period/message of a list
+_YEAR_RE = re.compile(r"\d{4}")
+# 'Field-Name: value' lines of the header of a message page
+_HEADER_RE = re.compile(r"^[^\S\n]*([^:\n]*?)[^\S\n]*:(.*)$", re.MULTILINE)
+# a 'Field-Name: value' line of the header in a LISTSERV file
+_FILE_HEADER_LINE_RE = re.compile(r"\S+:\s+\S+")
+# the address in e.g. 'Jane Doe <jane@doe.org>'
+_ADDR_RE = re.compile(r"\<(.*)\>")
+_NON_ALNUM_RE = re.compile(r"[^a-zA-Z0-9]+")
+# body lines that mbox readers would take for the start of a new message
+_MBOX_FROM_LINE_RE = re.compile(r"^From ", re.MULTILINE)
+# the page number in the URL of an archive section
+_SECTION_PAGE_RE = re.compile(r"p=[0-9]+")
+# links searched for on every message page, compiled once; the list name
+# is passed as variable when the expression is evaluated
+_PLAIN_TEXT_HREFS_XPATH = XPath(
+    '//a[contains(@href, "A3=") and contains(@href, $name)'
+    ' and contains(@href, "Fplain")]/@href',
+    smart_strings=False,
+)
+# the plain text page of a message body is the body wrapped in a <pre>
+_PRE_RE = re.compile(r"<pre[^>]*>(.*?)</pre>", re.DOTALL | re.IGNORECASE)
+_CHARSET_RE = re.compile(rb"<meta[^>]*charset=[\"']?([\w-]+)", re.IGNORECASE)
+# the text of the header table of a message page, which is the fourth
+# ancestor of the first <b>Subject:</b>. The regex '^\bSubject\b' is
+# spelled out in plain XPath, with the word characters passed as variable,
+# as the EXSLT regex functions call back into python for every <b>.
+_HEADER_TEXT_XPATH = XPath(
+    '(//b[not(*) and starts-with(text(), "Subject")'
+    ' and translate(substring(text(), 8, 1), $word_chars, "")'
+    " = substring(text(), 8, 1)])[1]"
+    "/ancestor::*[4]//text()",
+    smart_strings=False,
+)
+_WORD_CHARS = string.ascii_letters + string.digits + "_"
 
-class ListservMessageWarning(BaseException):
-    """Base class for Archive class specific exceptions"""
+
+class ListservMessageWarning(UserWarning):
+    """Base class for Archive class specific warnings"""
 
     pass
 
 
-class ListservListWarning(BaseException):
-    """Base class for Archive class specific exceptions"""
+class ListservListWarning(UserWarning):
+    """Base class for Archive class specific warnings"""
 
     pass
 
 
-class ListservArchiveWarning(BaseException):
-    """Base class for Archive class specific exceptions"""
+class ListservArchiveWarning(UserWarning):
+    """Base class for Archive class specific warnings"""
 
     pass
 
@@ -66,12 +115,18 @@ class ListservMessage:
     date
     contenttype
     messageid
+    body_url
+        URL of the body, which is loaded from there on first access.
 
     Methods
     -------
     from_url
+    from_html
     get_header_from_html
     get_body_from_html
+    get_body_url_from_html
+    get_body_from_url
+    get_pre_text_from_source
     get_header_from_listserv_file
     get_body_from_listserv_file
     get_name
@@ -79,6 +134,7 @@ class ListservMessage:
     get_date
     remove_unwanted_header_content
     to_dict
+    to_mbox_string
     to_mbox
 
     Example
@@ -99,6 +155,30 @@ class ListservMessage:
         "date": "Mon, 11 Jan 1111 11:11:11",
         "contenttype": None,
     }
+    # the keys of `to_dict` and the attributes their values are read from
+    dict_fields = {
+        "Body": "body",
+        "Subject": "subject",
+        "FromName": "fromname",
+        "FromAddr": "fromaddr",
+        "ToName": "toname",
+        "ToAddr": "toaddr",
+        "Date": "date",
+        "ContentType": "contenttype",
+    }
+    # a list can hold a great many messages, which therefore have no
+    # per-instance __dict__
+    __slots__ = (
+        "_body",
+        "body_url",
+        "subject",
+        "fromname",
+        "fromaddr",
+        "toname",
+        "toaddr",
+        "date",
+        "contenttype",
+    )
 
     def __init__(
         self,
@@ -111,8 +191,11 @@ class ListservMessage:
         date: str,
         contenttype: str,
         messageid: Optional[str] = None,
+        body_url: Optional[str] = None,
     ):
         self.body = body
+        # if given, the body is only loaded from there once it is accessed
+        self.body_url = body_url
         self.subject = subject
         self.fromname = fromname
         self.fromaddr = fromaddr
@@ -121,6 +204,17 @@ class ListservMessage:
         self.date = date
         self.contenttype = contenttype
 
+    @property
+    def body(self) -> Optional[str]:
+        if self._body is None and self.body_url is not None:
+            self._body = ListservMessage.get_body_from_url(self.body_url)
+            self.body_url = None
+        return self._body
+
+    @body.setter
+    def body(self, body: Optional[str]):
+        self._body = body
+
     @classmethod
     def from_url(
         cls,
@@ -136,16 +230,40 @@ class ListservMessage:
         """
         if session is None:
             session = get_auth_session(url_login, **login)
-        soup = get_website_content(url, session=session)
+        source = get_website_source(url, session=session)
+        return cls.from_html(list_name, url, source, fields)
+
+    @classmethod
+    def from_html(
+        cls,
+        list_name: str,
+        url: str,
+        source: Union[bytes, str],
+        fields: str = "total",
+    ) -> "ListservMessage":
+        """
+        Create a ListservMessage from the HTML code of its page, without
+        any network access.
+
+        Args:
+            list_name: Name of the list the message belongs to.
+            url: URL of the message page, against which its links resolve.
+            source: HTML code of the message page.
+            fields: Content of the message to load, i.e. header and/or body
+        """
+        tree = parse_website_source(source)
         if fields in ["header", "total"]:
-            header = ListservMessage.get_header_from_html(soup)
+            header = ListservMessage.get_header_from_html(tree)
         else:
             header = cls.empty_header
         if fields in ["body", "total"]:
-            body = ListservMessage.get_body_from_html(list_name, url, soup)
+            # the body is on a page of its own, only load it when needed
+            body_url = ListservMessage.get_body_url_from_html(
+                list_name, url, tree
+            )
         else:
-            body = None
-        return cls(body, **header)
+            body_url = None
+        return cls(None, **header, body_url=body_url)
 
     @classmethod
     def from_listserv_file(
@@ -207,16 +325,21 @@ class ListservMessage:
         content = content[header_start_line_nr:header_end_line_nr]
         # collect important info from LISTSERV header
         header = {}
+        # each line is matched once, also when looking ahead from the line
+        # before it
+        is_field = [
+            _FILE_HEADER_LINE_RE.match(line) is not None for line in content
+        ]
         for lnr in range(len(content)):
             line = content[lnr]
             # get header keyword and value
-            if re.match(r"\S+:\s+\S+", line):
-                key = line.split(":")[0]
-                value = line.replace(key + ":", "").strip().rstrip("\n")
+            if is_field[lnr]:
+                key, _, value = line.partition(":")
+                value = value.strip()
                 # if not at the end of header
                 if lnr < len(content) - 1:
                     # if header-keyword value is split over two lines
-                    if not re.match(r"\S+:\s+\S+", content[lnr + 1]):
+                    if not is_field[lnr + 1]:
                         value += " " + content[lnr + 1].strip().rstrip("\n")
                 header[key.lower()] = value
         
@@ -247,20 +370,18 @@ class ListservMessage:
         return body
 
     @classmethod
-    def get_header_from_html(cls, soup: BeautifulSoup) -> Dict[str, str]:
+    def get_header_from_html(
+        cls, tree: lxml.html.HtmlElement
+    ) -> Dict[str, str]:
         """"""
-        text = soup.find(
-            "b",
-            text=re.compile(r"^\bSubject\b"),
-        ).parent.parent.parent.parent.text
+        text = "".join(_HEADER_TEXT_XPATH(tree, word_chars=_WORD_CHARS))
         # collect important info from LISTSERV header
-        header = {}
-        for field in text.split("Parts/Attachments:")[0].splitlines():
-            if len(field) == 0:
-                continue
-            field_name = field.split(":")[0].strip()
-            field_body = field.replace(field_name + ":", "").strip()
-            header[field_name.lower()] = field_body
+        header = {
+            field_name.lower(): field_body.strip()
+            for field_name, field_body in _HEADER_RE.findall(
+                text.split("Parts/Attachments:", 1)[0]
+            )
+        }
 
         header = cls.format_header_content(header)
         header = cls.remove_unwanted_header_content(header)
@@ -268,27 +389,68 @@ class ListservMessage:
 
     @staticmethod
     def get_body_from_html(
-        list_name: str, url: str, soup: BeautifulSoup
+        list_name: str, url: str, tree: lxml.html.HtmlElement
     ) -> str:
         """"""
-        try:
-            url_root = ("/").join(url.split("/")[:-2])
-            a_tags = soup.select(f'a[href*="A3="][href*="{list_name}"]')
-            href_plain_text = [
-                tag.get("href")
-                for tag in a_tags
-                if "Fplain" in tag.get("href")
-            ][0]
-            body_soup = get_website_content(
-                urljoin(url_root, href_plain_text)
-            )
-            return body_soup.find("pre").text
-        except Exception:
+        body_url = ListservMessage.get_body_url_from_html(list_name, url, tree)
+        if body_url is None:
+            return None
+        return ListservMessage.get_body_from_url(body_url)
+
+    @staticmethod
+    def get_body_url_from_html(
+        list_name: str, url: str, tree: lxml.html.HtmlElement
+    ) -> Optional[str]:
+        """
+        Get the URL of the plain text version of the message body.
+        """
+        hrefs = _PLAIN_TEXT_HREFS_XPATH(tree, name=list_name)
+        if not hrefs:
             logger.info(
                 f"The message body of {url} which is part of the "
-                f"list {list_name} could not be loaded."
+                f"list {list_name} could not be found."
             )
             return None
+        return urljoin(get_url_root(url), hrefs[0])
+
+    @staticmethod
+    def get_body_from_url(url: str) -> Optional[str]:
+        """
+        Load the message body from the plain text page at url.
+        """
+        try:
+            source = get_website_source(url)
+            body = ListservMessage.get_pre_text_from_source(source)
+            if body is None:
+                body_tree = parse_website_source(source)
+                body = str(body_tree.find(".//pre").text_content())
+            return body
+        except Exception:
+            logger.info(f"The message body at {url} could not be loaded.")
+            return None
+
+    @staticmethod
+    def get_pre_text_from_source(source: Union[bytes, str]) -> Optional[str]:
+        """
+        Cut the text of the first <pre> element out of the HTML source,
+        without parsing the page. Returns None if that is not possible
+        safely, i.e. if the <pre> contains other tags or if the encoding
+        of the page is not declared.
+        """
+        if isinstance(source, bytes):
+            charset = _CHARSET_RE.search(source)
+            if charset is None:
+                return None
+            try:
+                source = source.decode(charset.group(1).decode("ascii"))
+            except (LookupError, UnicodeDecodeError):
+                return None
+        match = _PRE_RE.search(source)
+        if match is None or "<" in match.group(1):
+            return None
+        # line breaks are normalized the way the HTML parser does it
+        text = match.group(1).replace("\r\n", "\n").replace("\r", "\n")
+        return html.unescape(text)
 
     @classmethod
     def format_header_content(cls, header: Dict[str, str]) -> Dict[str, str]:
@@ -330,23 +492,27 @@ class ListservMessage:
                 del header[key]
         return header
 
+    # The same few senders and dates recur across a list, so the parsed
+    # header fields are cached on the raw header string.
     @staticmethod
+    @functools.lru_cache(maxsize=8192)
     def get_name(line: str) -> str:
         # get string in between < and >
-        email_of_sender = re.findall(r"\<(.*)\>", line)
+        email_of_sender = _ADDR_RE.findall(line)
         if email_of_sender:
             # remove email_of_sender from line
             name = line.replace("<" + email_of_sender[0] + ">", "")
             # remove special characters
-            name = re.sub(r"[^a-zA-Z0-9]+", " ", name)
+            name = _NON_ALNUM_RE.sub(" ", name)
         else:
             name = line
         return name.strip()
 
     @staticmethod
+    @functools.lru_cache(maxsize=8192)
     def get_addr(line: str) -> Union[str, None]:
         # get string in between < and >
-        email_addr = re.findall(r"\<(.*)\>", line)
+        email_addr = _ADDR_RE.findall(line)
         if email_addr:
             email_addr = email_addr[0].strip()
         else:
@@ -354,12 +520,19 @@ class ListservMessage:
         return email_addr
 
     @staticmethod
+    @functools.lru_cache(maxsize=8192)
     def get_date(line: str) -> str:
-        line = (" ").join(line.split(" ")[:-1]).lstrip()
+        # RFC 2822 dates are parsed by the email package, which also copes
+        # with a missing weekday, time zone or seconds
+        date_tuple = email.utils.parsedate(line)
+        if date_tuple is not None:
+            date_time_obj = datetime.datetime(*date_tuple[:6])
+        else:
+            line = (" ").join(line.split(" ")[:-1]).lstrip()
+            date_time_obj = datetime.datetime.strptime(
+                line, "%a, %d %b %Y %H:%M:%S"
+            )
         # convert format to local version of date and time
-        date_time_obj = datetime.datetime.strptime(
-            line, "%a, %d %b %Y %H:%M:%S"
-        )
         return date_time_obj.strftime("%c")
     
     @staticmethod
@@ -371,48 +544,49 @@ class ListservMessage:
         #    date = 'Wed Jan 11 11:11:11 1111'
         message_id = (".").join([date, from_address])
         # remove special characters
-        message_id = re.sub(r"[^a-zA-Z0-9]+", "", message_id)
+        message_id = _NON_ALNUM_RE.sub("", message_id)
         return message_id
 
     def to_dict(self) -> Dict[str, str]:
-        dic = {
-            "Body": self.body,
-            "Subject": self.subject,
-            "FromName": self.fromname,
-            "FromAddr": self.fromaddr,
-            "ToName": self.toname,
-            "ToAddr": self.toaddr,
-            "Date": self.date,
-            "ContentType": self.contenttype,
+        return {
+            key: getattr(self, attr)
+            for key, attr in ListservMessage.dict_fields.items()
         }
-        return dic
 
-    def to_mbox(self, filepath: str, mode: str = "w"):
+    def to_mbox_string(self) -> str:
         """
-        Safe mail list to .mbox files.
+        Format the message as it is written to .mbox files.
         """
         message_id = ListservMessage.create_message_id(
             self.date,
             self.fromaddr,
         )
-        f = open(filepath, mode, encoding="utf-8")
-        f.write("\n")
+        parts = ["\n"]
         # check that header was selected
         if self.subject is not None:
-            f.write(f"From b'{self.fromaddr}' {self.date}\n")
-            f.write(f"Content-Type: {self.contenttype}\n")
-            f.write(f"MIME-Version: 1.0\n")
-            f.write(f"In-Reply-To: {self.toname} <b'{self.toaddr}'>\n")
-            f.write(f"From: {self.fromname} <b'{self.fromaddr}'>\n")
-            f.write(f"Subject: b'{self.subject}\n")
-            f.write(f"Message-ID: <{message_id}>'\n")
-            f.write(f"Date: {self.date}'\n")
-            f.write("\n")
+            parts += [
+                f"From b'{self.fromaddr}' {self.date}\n",
+                f"Content-Type: {self.contenttype}\n",
+                f"MIME-Version: 1.0\n",
+                f"In-Reply-To: {self.toname} <b'{self.toaddr}'>\n",
+                f"From: {self.fromname} <b'{self.fromaddr}'>\n",
+                f"Subject: b'{self.subject}\n",
+                f"Message-ID: <{message_id}>'\n",
+                f"Date: {self.date}'\n",
+                "\n",
+            ]
         # check that body was selected
         if self.body is not None:
-            f.write(self.body)
-            f.write("\n")
-        f.close()
+            # escaped like email.generator does with mangle_from_=True
+            parts += [_MBOX_FROM_LINE_RE.sub(">From ", self.body), "\n"]
+        return "".join(parts)
+
+    def to_mbox(self, filepath: str, mode: str = "w"):
+        """
+        Safe mail list to .mbox files.
+        """
+        with open(filepath, mode, encoding="utf-8") as f:
+            f.write(self.to_mbox_string())
 
 
 class ListservList:
@@ -437,9 +611,11 @@ class ListservList:
     from_listserv_files
     from_listserv_directories
     get_messages_from_url
+    get_messages_from_urls
     get_period_urls
     get_line_numbers_of_header_starts
     get_index_of_elements_in_selection
+    get_selection_condition
     to_dict
     to_pandas_dataframe
     to_mbox
@@ -458,6 +634,13 @@ class ListservList:
     )
     """
 
+    # number of pages that are fetched concurrently
+    MAX_WORKERS = 8
+    # upper limit of requests per second to the server (see RATE_LIMITER),
+    # for politeness
+    RATE_PER_SEC = 2.0
+    __slots__ = ("name", "source", "messages")
+
     def __init__(
         self,
         name: str,
@@ -527,16 +710,7 @@ class ListservList:
             # create ListservList from message URLs
             if session is None:
                 session = get_auth_session(url_login, **login)
-            msgs = []
-            for idx, url in enumerate(messages):
-                msgs.append(
-                    ListservMessage.from_url(
-                        list_name=name,
-                        url=url,
-                        fields=fields,
-                        session=session,
-                    )
-                )
+            msgs = cls.get_messages_from_urls(name, messages, fields, session)
         else:
             # create ListservList from list of ListservMessages
             msgs = messages
@@ -632,22 +806,84 @@ class ListservList:
         """
         if select is None:
             select = {"fields": "total"}
-        msgs = []
-        # run through periods
-        for period_url in ListservList.get_period_urls(url, select):
-            # run through messages within period
-            for msg_url in ListservList.get_messages_urls(name, period_url):
-                msgs.append(
-                    ListservMessage.from_url(
-                        name,
-                        msg_url,
-                        select["fields"],
-                        session=session,
-                    )
+        # the fetches are I/O-bound, let a few of them overlap. First collect
+        # the message URLs of all periods, then load the messages themselves.
+        # executor.map keeps the order of its input.
+        with ThreadPoolExecutor(max_workers=cls.MAX_WORKERS) as executor:
+            period_urls = ListservList.get_period_urls(url, select)
+            msg_urls = [
+                msg_url
+                for msg_urls_of_period in executor.map(
+                    functools.partial(ListservList.get_messages_urls, name),
+                    period_urls,
                 )
-                logger.info(f"Recorded the message {msg_url}.")
-                # wait between loading messages, for politeness
-                time.sleep(1)
+                for msg_url in msg_urls_of_period
+            ]
+        return cls.get_messages_from_urls(
+            name, msg_urls, select["fields"], session
+        )
+
+    @classmethod
+    def get_messages_from_urls(
+        cls,
+        name: str,
+        msg_urls: List[str],
+        fields: str = "total",
+        session: Optional[dict] = None,
+    ) -> List[ListservMessage]:
+        """
+        Load the messages at the given URLs concurrently, in the order of
+        the URLs.
+
+        Args:
+            name: Name of the list of messages, e.g. '3GPP_TSG_SA_WG2_UPCON'
+            msg_urls: URLs to LISTSERV messages.
+            fields: Content of the messages to load, i.e. header and/or body
+            session: AuthSession
+        """
+
+        def get_message(msg_url: str) -> Optional[ListservMessage]:
+            # a page that can not be loaded or parsed is skipped, instead of
+            # failing the whole list
+            try:
+                msg = ListservMessage.from_url(
+                    name,
+                    msg_url,
+                    fields,
+                    session=session,
+                )
+            except Exception as e:
+                warnings.warn(
+                    f"Skipped the message {msg_url}: {e!r}",
+                    ListservMessageWarning,
+                )
+                return None
+            logger.info(f"Recorded the message {msg_url}.")
+            return msg
+
+        with ThreadPoolExecutor(max_workers=cls.MAX_WORKERS) as executor:
+            msgs = [
+                msg
+                for msg in executor.map(get_message, msg_urls)
+                if msg is not None
+            ]
+            # a second wave loads the bodies, requesting each plain text
+            # page once even if several messages link to it
+            body_urls = list(
+                dict.fromkeys(
+                    msg.body_url for msg in msgs if msg.body_url is not None
+                )
+            )
+            bodies = dict(
+                zip(
+                    body_urls,
+                    executor.map(ListservMessage.get_body_from_url, body_urls),
+                )
+            )
+        for msg in msgs:
+            if msg.body_url is not None:
+                msg.body = bodies[msg.body_url]
+                msg.body_url = None
         return msgs
 
     @classmethod
@@ -658,44 +894,45 @@ class ListservList:
         All messages within a certain period
         (e.g. January 2021, Week 5).
         """
-        # create dictionary with key indicating period and values the url
         periods, urls_of_periods = cls.get_all_periods_and_their_urls(url)
 
-        if any(
-            period in list(select.keys())
-            for period in ["years", "months", "weeks"]
-        ):
-            for key, value in select.items():
-                if key == "years":
-                    cond = lambda x: int(re.findall(r"\d{4}", x)[0])
-                elif key == "months":
-                    cond = lambda x: x.split(" ")[0]
-                elif key == "weeks":
-                    cond = lambda x: int(x.split(" ")[-1])
-                else:
-                    continue
-
-                periodquants = [cond(period) for period in periods]
-
-                indices = ListservList.get_index_of_elements_in_selection(
-                    periodquants,
-                    urls_of_periods,
-                    value,
-                )
-
-                periods = [periods[idx] for idx in indices]
-                urls_of_periods = [urls_of_periods[idx] for idx in indices]
-        return urls_of_periods
+        # how to get the year, month, or week out of e.g. 'May 2021, Week 2'
+        periodquants = {
+            "years": lambda x: int(_YEAR_RE.search(x).group(0)),
+            "months": lambda x: x.split(" ")[0],
+            "weeks": lambda x: int(x.split(" ")[-1]),
+        }
+        # the year, which rules out the most periods, is checked first
+        conds = [
+            (periodquant, ListservList.get_selection_condition(select[key]))
+            for key, periodquant in periodquants.items()
+            if key in select
+        ]
+        if not conds:
+            return list(urls_of_periods)
+        # a single pass over the periods, checking all selection criteria
+        return [
+            url_of_period
+            for period, url_of_period in zip(periods, urls_of_periods)
+            if all(cond(periodquant(period)) for periodquant, cond in conds)
+        ]
 
     @staticmethod
     def get_all_periods_and_their_urls(url: str) -> Tuple[List[str], List[str]]:
-        url_root = ("/").join(url.split("/")[:-2])
-        soup = get_website_content(url)
-        periods = [list_tag.find("a").text for list_tag in soup.find_all("li")]
-        urls_of_periods = [
-            urljoin(url_root, list_tag.find("a").get("href"))
-            for list_tag in soup.find_all("li")
-        ]
+        """
+        Get the periods listed on the index page of a list, e.g.
+        "November 2015, Week 4", and the URLs of their pages.
+
+        Args:
+            url: URL of the list's index page.
+
+        Returns:
+            The periods and, in the same order, the URLs of their pages.
+        """
+        url_root = get_url_root(url)
+        links = get_website_links(url, within="li")
+        periods = [text for _, text in links]
+        urls_of_periods = [urljoin(url_root, href) for href, _ in links]
         return periods, urls_of_periods
 
     @staticmethod
@@ -722,19 +959,35 @@ class ListservList:
         Returns:
             Indices of to the elements in `times`/`ursl`.
         """
+        cond = ListservList.get_selection_condition(filtr)
+        return [idx for idx, time in enumerate(times) if cond(time)]
+
+    @staticmethod
+    def get_selection_condition(
+        filtr: Union[tuple, list, int, str],
+    ) -> Callable[[Union[int, str]], bool]:
+        """
+        Get the condition that a year, month, or week-of-month has to fulfill
+        to be in a selection (see `get_index_of_elements_in_selection`).
+
+        Args:
+            filtr: Containing info on what should be filtered.
+        """
         if isinstance(filtr, tuple):
             # filter year or week in range
-            cond = lambda x: (np.min(filtr) <= x <= np.max(filtr))
+            lower, upper = min(filtr), max(filtr)
+            cond = lambda x: (lower <= x <= upper)
         if isinstance(filtr, list):
             # filter in year, week, or month in list
-            cond = lambda x: x in filtr
+            members = frozenset(filtr)
+            cond = lambda x: x in members
         if isinstance(filtr, int):
             # filter specific year or week
             cond = lambda x: x == filtr
         if isinstance(filtr, str):
             # filter specific month
             cond = lambda x: x == filtr
-        return [idx for idx, time in enumerate(times) if cond(time)]
+        return cond
 
     @classmethod
     def get_messages_urls(cls, name: str, url: str) -> List[str]:
@@ -746,15 +999,12 @@ class ListservList:
         Returns:
             List to URLs from which`ListservMessage` can be initialized.
         """
-        url_root = ("/").join(url.split("/")[:-2])
-        soup = get_website_content(url)
-        a_tags = soup.select(f'a[href*="A2="][href*="{name}"]')
-        if a_tags:
-            a_tags = [
-                urljoin(url_root, url.get("href"))
-                for url in a_tags
-            ]
-        return a_tags
+        url_root = get_url_root(url)
+        return [
+            urljoin(url_root, href)
+            for href, _ in get_website_links(url)
+            if "A2=" in href and name in href
+        ]
 
     @classmethod
     def get_line_numbers_of_header_starts(
@@ -810,19 +1060,14 @@ class ListservList:
                 "ContentType": [messages[0], ... , messages[n]]
             }
         """
-        # initialize dictionary
-        dic = {}
-        for key in list(self.messages[0].to_dict().keys()):
-            dic[key] = []
-        # run through messages
-        for msg in self.messages:
-            # run through message attributes
-            for key, value in msg.to_dict().items():
-                dic[key].append(value)
-        return dic
+        # one column at a time, read directly from the message attributes
+        return {
+            key: [getattr(msg, attr) for msg in self.messages]
+            for key, attr in ListservMessage.dict_fields.items()
+        }
 
     def to_pandas_dataframe(self) -> pd.DataFrame:
-        return pd.DataFrame.from_dict(self.to_dict())
+        return pd.DataFrame(self.to_dict())
 
     def to_mbox(self, dir_out: str, filename: Optional[str] = None):
         """
@@ -835,13 +1080,12 @@ class ListservList:
         else:
             filepath = f"{dir_out}/{filename}.mbox"
         logger.info(f"The list {self.name} is saved at {filepath}.")
-        first = True
-        for msg in self.messages:
-            if first:
-                msg.to_mbox(filepath, mode="w")
-                first = False
-            else:
-                msg.to_mbox(filepath, mode="a")
+        if not self.messages:
+            return
+        # open the file once for all messages, with a large write buffer
+        with open(filepath, "w", encoding="utf-8", buffering=1 << 20) as f:
+            for msg in self.messages:
+                f.write(msg.to_mbox_string())
 
 
 class ListservArchive(object):
@@ -869,6 +1113,7 @@ class ListservArchive(object):
     to_dict
     to_pandas_dataframe
     to_mbox
+    to_parquet
 
     Example
     -------
@@ -932,7 +1177,8 @@ class ListservArchive(object):
             only_list_urls: Boolean giving the choice to collect only `ListservList`
                 URLs or also their contents.
         """
-        session = get_auth_session(url_login, **login)
+        if session is None:
+            session = get_auth_session(url_login, **login)
         lists = cls.get_lists_from_url(
             url_root,
             url_home,
@@ -1053,24 +1299,35 @@ class ListservArchive(object):
         for url in list(
             ListservArchive.get_sections(url_root, url_home).keys()
         ):
-            soup = get_website_content(url)
-            a_tags_in_section = soup.select(
-                f'a[href^="{urlparse(url).path}?A0="]',
-            )
-
-            mlist_urls = [
-                urljoin(url_root, a_tag.get("href"))
-                for a_tag in a_tags_in_section
+            prefix = f"{urlparse(url).path}?A0="
+            hrefs_in_section = [
+                href
+                for href, _ in get_website_links(url)
+                if href.startswith(prefix)
             ]
+
+            mlist_urls = [urljoin(url_root, href) for href in hrefs_in_section]
             mlist_urls = list(set(mlist_urls))  # remove duplicates
 
             if only_mlist_urls:
-                # collect mailing-list urls
-                [
-                    archive.append(mlist_url)
-                    for mlist_url in mlist_urls
-                    if len(ListservList.get_all_periods_and_their_urls(mlist_url)[1]) > 0
-                ]
+                # collect urls of mailing-lists that contain any period,
+                # probing the lists concurrently
+                with ThreadPoolExecutor(
+                    max_workers=ListservList.MAX_WORKERS
+                ) as executor:
+                    period_urls = executor.map(
+                        lambda mlist_url: (
+                            ListservList.get_all_periods_and_their_urls(
+                                mlist_url
+                            )[1]
+                        ),
+                        mlist_urls,
+                    )
+                    archive.extend(
+                        mlist_url
+                        for mlist_url, urls in zip(mlist_urls, period_urls)
+                        if len(urls) > 0
+                    )
 
             else:
                 # collect mailing-list contents
@@ -1103,19 +1360,19 @@ class ListservArchive(object):
             If sections exist, it returns their urls and names. Otherwise it returns
             the url_home.
         """
-        soup = get_website_content(url_home)
-        sections = soup.select(
-            'a[href*="INDEX="][href*="p="]',
-        )
+        sections = [
+            (href, text)
+            for href, text in get_website_links(url_home)
+            if "INDEX=" in href and "p=" in href
+        ]
         archive_sections_dict = {}
         if sections:
-            for sec in sections:
-                key = urljoin(url_root, sec.get("href"))
-                value = sec.text
+            for href, value in sections:
+                key = urljoin(url_root, href)
                 if value in ["Next", "Previous"]:
                     continue
                 archive_sections_dict[key] = value
-            archive_sections_dict[re.sub(r'p=[0-9]+', 'p=1', key)] = 'FIRST'
+            archive_sections_dict[_SECTION_PAGE_RE.sub('p=1', key)] = 'FIRST'
         else:
             archive_sections_dict[url_home] = "Home"
         return archive_sections_dict
@@ -1158,23 +1415,22 @@ class ListservArchive(object):
                 "ListName": [messages[0], ... , messages[n]]
             }
         """
-        # initialize dictionary
-        dic = {}
-        for key in list(self.lists[0].messages[0].to_dict().keys()):
-            dic[key] = []
-        dic["ListName"] = []
-        # run through lists
-        for mlist in self.lists:
-            # run through messages
-            for msg in mlist.messages:
-                # run through message attributes
-                for key, value in msg.to_dict().items():
-                    dic[key].append(value)
-                dic["ListName"].append(mlist.name)
+        # one column at a time, read directly from the message attributes
+        dic = {
+            key: [
+                getattr(msg, attr)
+                for mlist in self.lists
+                for msg in mlist.messages
+            ]
+            for key, attr in ListservMessage.dict_fields.items()
+        }
+        dic["ListName"] = [
+            mlist.name for mlist in self.lists for _ in mlist.messages
+        ]
         return dic
 
     def to_pandas_dataframe(self) -> pd.DataFrame:
-        return pd.DataFrame.from_dict(self.to_dict())
+        return pd.DataFrame(self.to_dict())
 
     def to_mbox(self, dir_out: str):
         """
@@ -1183,6 +1439,46 @@ class ListservArchive(object):
         for llist in self.lists:
             llist.to_mbox(dir_out)
 
+    def to_parquet(self, filepath: str, batch_size: int = 10000):
+        """
+        Save the messages of all lists, with the columns of
+        `to_pandas_dataframe`, to a Parquet file. The file is written in
+        batches of messages, without building the whole table in memory.
+
+        Args:
+            filepath: Path of the Parquet file.
+            batch_size: Number of messages written at a time.
+        """
+        # columns with few distinct values are dictionary encoded
+        dictionary_columns = ["FromAddr", "ContentType", "ListName"]
+        schema = pa.schema(
+            [
+                (
+                    key,
+                    pa.dictionary(pa.int32(), pa.string())
+                    if key in dictionary_columns
+                    else pa.string(),
+                )
+                for key in [*ListservMessage.dict_fields, "ListName"]
+            ]
+        )
+        rows = (
+            (mlist.name, msg) for mlist in self.lists for msg in mlist.messages
+        )
+        with pq.ParquetWriter(filepath, schema) as writer:
+            while True:
+                batch = list(itertools.islice(rows, batch_size))
+                if not batch:
+                    break
+                columns = {
+                    key: [getattr(msg, attr) for _, msg in batch]
+                    for key, attr in ListservMessage.dict_fields.items()
+                }
+                columns["ListName"] = [name for name, _ in batch]
+                writer.write_table(
+                    pa.Table.from_pydict(columns, schema=schema)
+                )
+
 
 def get_auth_session(
     url_login: str, username: str, password: str
@@ -1195,7 +1491,7 @@ def get_auth_session(
         return None
     else:
         # Start the AuthSession
-        session = requests.Session()
+        session = get_http_session()
         # Create the payload
         payload = {
             "LOGIN1": "",
@@ -1256,20 +1552,344 @@ def loginkey_to_file(
     file.close()
 
 
-def get_website_content(
+class RateLimiter:
+    """
+    Token bucket, shared between threads, that lets at most *rate* calls
+    per second pass.
+
+    Args:
+        rate: Number of calls per second.
+        burst: Number of calls that can pass at once after a pause.
+    """
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.interval = 1 / rate
+        self.burst = burst
+        self._next_time = time.monotonic()
+        self._lock = threading.Lock()
+
+    def wait(self) -> None:
+        """Block until the next call is allowed."""
+        with self._lock:
+            now = time.monotonic()
+            # unused tokens are kept up to the size of the bucket
+            start = max(
+                self._next_time, now - (self.burst - 1) * self.interval
+            )
+            self._next_time = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+
+
+class ResponseCache:
+    """
+    Persistent cache of website sources, stored in a sqlite database.
+
+    Archived messages never change, so their pages are kept forever, while
+    all other pages, e.g. the index pages of lists and periods, expire after
+    *expire_after* seconds. Expired pages are revalidated with a conditional
+    request, if the server sent an ETag or Last-Modified header for them.
+
+    Args:
+        path: Path to the sqlite database.
+        expire_after: Lifetime of index pages in seconds.
+    """
+
+    # URLs of the header and body pages of single messages contain the key,
+    # and the pages themselves the pattern, unlike e.g. login or error pages
+    # served under the same URLs
+    PERMANENT_PAGES = {
+        "A2=": re.compile(rb"<b>Subject\W"),
+        "A3=": re.compile(rb"<pre[\s>]", re.IGNORECASE),
+    }
+
+    def __init__(self, path: str, expire_after: float = 86400):
+        self.path = path
+        self.expire_after = expire_after
+        self._connection = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._connection is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._connection = sqlite3.connect(
+                self.path, check_same_thread=False
+            )
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS responses (url TEXT PRIMARY KEY,"
+                " fetched REAL, source, etag TEXT, last_modified TEXT,"
+                " permanent INTEGER)"
+            )
+            # caches written by older versions lack some of the columns;
+            # their pages are not permanent until they are fetched again
+            columns = [
+                row[1]
+                for row in self._connection.execute(
+                    "PRAGMA table_info(responses)"
+                )
+            ]
+            for column, dtype in [
+                ("etag", "TEXT"),
+                ("last_modified", "TEXT"),
+                ("permanent", "INTEGER"),
+            ]:
+                if column not in columns:
+                    self._connection.execute(
+                        f"ALTER TABLE responses ADD COLUMN {column} {dtype}"
+                    )
+        return self._connection
+
+    def _is_permanent(self, url: str, source: Union[bytes, str]) -> bool:
+        if isinstance(source, str):
+            source = source.encode("utf-8")
+        return any(
+            key in url and pattern.search(source) is not None
+            for key, pattern in self.PERMANENT_PAGES.items()
+        )
+
+    def get(self, url: str) -> Union[bytes, str, None]:
+        """Return the cached source of url, or None if it is not fresh."""
+        with self._lock:
+            row = (
+                self._connect()
+                .execute(
+                    "SELECT fetched, source, permanent FROM responses"
+                    " WHERE url = ?",
+                    (url,),
+                )
+                .fetchone()
+            )
+        if row is None:
+            return None
+        fetched, source, permanent = row
+        if permanent:
+            return source
+        if time.time() - fetched < self.expire_after:
+            return source
+        return None
+
+    def get_validators(self, url: str) -> Dict[str, str]:
+        """
+        Return the headers of a conditional request for the cached source
+        of url, which is empty if there is nothing to revalidate.
+        """
+        with self._lock:
+            row = (
+                self._connect()
+                .execute(
+                    "SELECT etag, last_modified FROM responses WHERE url = ?",
+                    (url,),
+                )
+                .fetchone()
+            )
+        headers = {}
+        if row is not None:
+            etag, last_modified = row
+            if etag is not None:
+                headers["If-None-Match"] = etag
+            if last_modified is not None:
+                headers["If-Modified-Since"] = last_modified
+        return headers
+
+    def revalidate(self, url: str) -> Union[bytes, str, None]:
+        """
+        Mark the cached source of url as fresh again, after the server
+        answered that it is not modified, and return it.
+        """
+        with self._lock:
+            connection = self._connect()
+            connection.execute(
+                "UPDATE responses SET fetched = ? WHERE url = ?",
+                (time.time(), url),
+            )
+            connection.commit()
+            row = connection.execute(
+                "SELECT source FROM responses WHERE url = ?", (url,)
+            ).fetchone()
+        return None if row is None else row[0]
+
+    def set(
+        self,
+        url: str,
+        source: Union[bytes, str],
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+    ) -> None:
+        with self._lock:
+            connection = self._connect()
+            connection.execute(
+                "INSERT OR REPLACE INTO responses"
+                " (url, fetched, source, etag, last_modified, permanent)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    url,
+                    time.time(),
+                    source,
+                    etag,
+                    last_modified,
+                    self._is_permanent(url, source),
+                ),
+            )
+            connection.commit()
+
+
+# set to None to always request pages from the server
+RESPONSE_CACHE = ResponseCache(CONFIG.listserv_cache_path)
+
+# shared by all requests, of all threads, to the server; pages served from
+# RESPONSE_CACHE do not count. Set to None to not limit the request rate.
+RATE_LIMITER = RateLimiter(ListservList.RATE_PER_SEC)
+
+
+def get_http_session() -> requests.Session:
+    """
+    Create a session that keeps a pool of connections to each server alive,
+    one per worker thread, instead of reconnecting for every page, and
+    that retries failed connections. Like any requests session it asks for
+    compressed pages (gzip, deflate and br if brotli is installed) and
+    decompresses them transparently.
+    """
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(
+        pool_maxsize=ListservList.MAX_WORKERS,
+        max_retries=Retry(total=3, backoff_factor=0.2),
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+# pages requested without AuthSession share this session
+HTTP_SESSION = get_http_session()
+atexit.register(HTTP_SESSION.close)
+
+# seconds to wait for the server to connect and to send data, so that a
+# stalled connection does not block a worker forever
+REQUEST_TIMEOUT = 30
+
+
+def parse_website_source(source: Union[bytes, str]) -> lxml.html.HtmlElement:
+    """
+    Parse HTML code with lxml, or with BeautifulSoup if lxml can not.
+    """
+    try:
+        return lxml.html.fromstring(source)
+    except (ParserError, ValueError):
+        return soupparser.fromstring(source)
+
+
+def get_website_links(
     url: str,
     session: Optional[requests.Session] = None,
-) -> BeautifulSoup:
-    """ Get HTML code from website """
-    # TODO: include option to change BeautifulSoup args
+    within: Optional[str] = None,
+) -> List[Tuple[str, str]]:
+    """
+    Get the targets and texts of all links on a website. The page is
+    streamed through a pull parser, which only keeps the <a> elements
+    until they are read, instead of building the tree of the whole page.
+
+    Args:
+        url: URL of the website.
+        session: AuthSession
+        within: If given, only the first link inside each element with
+            this tag is returned, e.g. the first link of each "li".
+    """
+    source = get_website_source(url, session)
+    if within is None:
+        parser = HTMLPullParser(events=("end",), tag="a")
+    else:
+        parser = HTMLPullParser(events=("start", "end"), tag=("a", within))
+    links = []
+    # whether the first link inside the current `within` element is due
+    first_link_due = False
+
+    def read_links():
+        nonlocal first_link_due
+        for event, element in parser.read_events():
+            if element.tag != "a":
+                first_link_due = event == "start"
+                if event == "end":
+                    element.clear(keep_tail=True)
+            elif event == "end":
+                if within is None or first_link_due:
+                    first_link_due = False
+                    href = element.get("href")
+                    if href is not None:
+                        links.append((href, "".join(element.itertext())))
+                element.clear(keep_tail=True)
+
+    chunk_size = 1 << 16
+    try:
+        for start in range(0, len(source), chunk_size):
+            parser.feed(source[start : start + chunk_size])
+            read_links()
+        parser.close()
+    except LxmlError:
+        # e.g. an empty page, which has no links
+        return links
+    read_links()
+    return links
+
+
+def get_website_source(
+    url: str,
+    session: Optional[requests.Session] = None,
+) -> Union[bytes, str]:
+    """
+    Get HTML code from website, or from RESPONSE_CACHE if it was fetched
+    before. Only pages requested without a login, i.e. without a session or
+    with HTTP_SESSION, are cached, since the pages seen by a logged in user
+    differ from the public ones and must not end up unencrypted on disk.
+
+    Args:
+        url: URL of the website.
+        session: AuthSession
+    """
+    if session is None or session is HTTP_SESSION:
+        cache = RESPONSE_CACHE
+    else:
+        cache = None
+    headers = {}
+    if cache is not None:
+        source = cache.get(url)
+        if source is not None:
+            return source
+        headers = cache.get_validators(url)
+    if RATE_LIMITER is not None:
+        RATE_LIMITER.wait()
     if session is None:
-        sauce = requests.get(url)
-        assert sauce.status_code == 200
-        soup = BeautifulSoup(sauce.content, "html.parser")
+        sauce = HTTP_SESSION.get(url, headers=headers, timeout=REQUEST_TIMEOUT)
+        # 304 Not Modified only answers a conditional request
+        assert sauce.status_code in (200, 304)
+    else:
+        sauce = session.get(url, headers=headers, timeout=REQUEST_TIMEOUT)
+    # pages that declare their encoding are handed to lxml undecoded, which
+    # decodes them while parsing. Others are decoded by requests.
+    if _CHARSET_RE.search(sauce.content):
+        source = sauce.content
     else:
-        sauce = session.get(url)
-        soup = BeautifulSoup(sauce.text, "html.parser")
-    return soup
+        source = sauce.text
+    if cache is not None:
+        if sauce.status_code == 304:
+            return cache.revalidate(url)
+        if sauce.status_code == 200:
+            cache.set(
+                url,
+                source,
+                sauce.headers.get("ETag"),
+                sauce.headers.get("Last-Modified"),
+            )
+    return source
+
+
+def get_url_root(url: str) -> str:
+    """
+    Get the root of a LISTSERV URL, against which the relative links of its
+    page are resolved, e.g. https://list.etsi.org for
+    https://list.etsi.org/scripts/wa.exe?A0=3GPP_TSG_CT_WG6
+    """
+    # one split from the right instead of splitting at every slash
+    return url.rsplit("/", 2)[0]
 
 
 def get_paths_to_files_in_directory(
@@ -37,28 +37,40 @@ def repartition_dataframe(df, partition):
     return df2
 
 
+def _common_prefix_length(seq1, seq2):
+    """
+    Return the length of the common prefix of two strings or lists.
+
+    Binary search over slice comparisons, which run in C, instead of
+    comparing the sequences item by item in python.
+    """
+    lo, hi = 0, min(len(seq1), len(seq2))
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if seq1[lo:mid] == seq2[lo:mid]:
+            lo = mid
+        else:
+            hi = mid - 1
+    return lo
+
+
 def get_common_head(str1, str2, delimiter=None):
     try:
         if str1 is None or str2 is None:
             return "", 0
-        else:
-            # this is ugly control flow clean it
-            if delimiter is not None:
-
-                dstr1 = str1.split(delimiter)
-                dstr2 = str2.split(delimiter)
-
-                for i in range(len(dstr1)):
-                    if dstr1[:i] != dstr2[:i]:
-                        # print list1[:i], list2[:i]
-                        return delimiter.join(dstr1[: i - 1]), i - 1
-                return str1, i
-            else:
-                for i in range(len(str1)):
-                    if str1[:i] != str2[:i]:
-                        # print list1[:i], list2[:i]
-                        return str1[: i - 1], i - 1
-                return str1[:i], i
+        elif delimiter is not None:
+            dstr1 = str1.split(delimiter)
+            dstr2 = str2.split(delimiter)
+
+            n = _common_prefix_length(dstr1, dstr2)
+            if n + 1 < len(dstr1):
+                return delimiter.join(dstr1[:n]), n
+            return str1, len(dstr1) - 1
+        elif len(str1) > 0:
+            n = _common_prefix_length(str1, str2)
+            if n + 1 < len(str1):
+                return str1[:n], n
+            return str1[:-1], len(str1) - 1
 
         return "", 0
     except Exception as e:
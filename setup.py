@@ -12,21 +12,25 @@ config = {
     'version': '0.1',
     'install_requires': [
         'beautifulsoup4',
+        'brotli',
         'chardet',
         'coverage',
         'html2text',
         'ipython',
         'jinja2',
         'jsonschema',
+        'lxml',
         'matplotlib',
         'networkx',
         'numpy',
         'pandas',
+        'pyarrow',
         'pytest',
         'python-dateutil',
         'python-Levenshtein',
         'pytz',
         'pyzmq',
+        'scipy',
         'tornado',
         'requests',
         'pyyaml',
@@ -0,0 +1,18 @@
+import pytest
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--network",
+        action="store_true",
+        help="run the tests marked 'network', which request live servers",
+    )
+
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption("--network"):
+        return
+    skip_network = pytest.mark.skip(reason="needs --network to run")
+    for item in items:
+        if "network" in item.keywords:
+            item.add_marker(skip_network)
@@ -9,6 +9,7 @@ import unittest
 
 import networkx as nx
 import pandas as pd
+import pytest
 from testfixtures import LogCapture
 
 import bigbang.archive as archive
@@ -194,6 +195,10 @@ class TestMailman(unittest.TestCase):
 
 
 class TestArchive(unittest.TestCase):
+    @pytest.fixture(autouse=True)
+    def get_tmp_path(self, tmp_path):
+        self.tmp_path = tmp_path
+
     def test_mailman_chain(self):
         name = "bigbang-dev-test.txt"
 
@@ -234,6 +239,102 @@ class TestArchive(unittest.TestCase):
 
         os.remove("test.csv")
 
+    def test_save_load_parquet(self):
+        name = "bigbang-dev-test.txt"
+
+        arx = archive.Archive(
+            name, archive_dir=CONFIG.test_data_path, mbox=True
+        )
+
+        # a pathlib.Path works as well as a str
+        path = self.tmp_path / "test.parquet"
+        arx.save(path)
+        arx2 = archive.load(path)
+
+        self.assertTrue(
+            arx.data.equals(arx2.data),
+            msg="Original and restored archives are different",
+        )
+        self.assertTrue(
+            str(arx2.data["Date"].dtype) == "datetime64[ns, UTC]",
+            msg="Dates of restored archive are not timezone aware",
+        )
+
+    def test_load_csv_empty_cells(self):
+        pd.DataFrame(
+            {
+                "Message-ID": ["<a@example.com>", "<b@example.com>"],
+                "From": ["a@example.com", None],
+                "Date": ["2020-01-01 10:00:00+00:00"] * 2,
+                "In-Reply-To": [None, "<a@example.com>"],
+                "Body": ["Hi", None],
+            }
+        ).to_csv(self.tmp_path / "test_empty_cells.csv", index=False)
+
+        arx = archive.load(self.tmp_path / "test_empty_cells.csv")
+
+        self.assertTrue(
+            arx.data["Body"]["<b@example.com>"] is None,
+            msg="Empty body was not loaded as None",
+        )
+        self.assertTrue(
+            arx.data["From"].isnull().tolist() == [False, True],
+            msg="Empty sender was not loaded as missing",
+        )
+        self.assertTrue(
+            "" not in arx.get_activity().columns,
+            msg="Empty sender shows up in the activity",
+        )
+
+    def test_activity_sparse(self):
+        name = "2001-November.txt"
+
+        arx = archive.Archive(
+            name, archive_dir=CONFIG.test_data_path, mbox=True
+        )
+
+        sparse = arx.get_activity_sparse()
+
+        self.assertTrue(
+            sparse.sparse.to_dense().equals(arx.get_activity()),
+            msg="Sparse and dense activity matrices differ",
+        )
+
+    def test_compute_activity_counts(self):
+        arx = archive.Archive(
+            pd.DataFrame(
+                {
+                    "Message-ID": [f"<{i}@example.com>" for i in range(4)],
+                    "From": ["a@example.com", "b@example.com"] * 2,
+                    "Date": [
+                        "2020-01-01 10:00:00+00:00",
+                        "2020-01-02 10:00:00+00:00",
+                        "2020-01-01 20:00:00+00:00",
+                        # the last day has to be counted as well
+                        "2020-01-04 23:30:00+00:00",
+                    ],
+                    "In-Reply-To": [None] * 4,
+                    "Body": ["Hi"] * 4,
+                }
+            )
+        )
+
+        activity = arx.get_activity()
+
+        first_day = pd.Timestamp("2020-01-01").toordinal()
+        self.assertTrue(
+            activity.index.tolist() == [first_day + day for day in range(4)],
+            msg="Activity is not indexed by every day from first to last",
+        )
+        self.assertTrue(
+            activity.columns.tolist() == ["a@example.com", "b@example.com"],
+            msg="Activity columns are not the senders",
+        )
+        self.assertTrue(
+            activity.values.tolist() == [[2, 0], [0, 1], [0, 0], [0, 1]],
+            msg="Activity counts are off",
+        )
+
     def test_clean_message(self):
         name = "2001-November.txt"
 
@@ -259,6 +360,23 @@ class TestArchive(unittest.TestCase):
             msg="Quoted text is in cleaned message",
         )
 
+    def test_find_footer(self):
+        bodies = pd.Series(
+            [
+                "Hi all,\nsee you\n--\nThe foot",
+                None,
+                "Hello,\nbye\n--\nThe foot",
+                "Hey,\nciao\n--\nThe foot",
+            ]
+        )
+
+        footer = archive.find_footer(bodies)
+
+        self.assertTrue(
+            footer == [(2, "--\nThe foot")],
+            msg="Footer shared by all messages not found",
+        )
+
     def test_email_entity_resolution(self):
         name = "2001-November.txt"
 
@@ -345,6 +463,28 @@ class TestUtils(unittest.TestCase):
             msg="Incorrected edges in labeled blockmodel",
         )
 
+    def test_get_common_head(self):
+        self.assertTrue(
+            utils.get_common_head("abcdefghijklmnop", "abcde12345")
+            == ("abcde", 5),
+            msg="Incorrect common head of strings",
+        )
+
+        self.assertTrue(
+            utils.get_common_head("abcdefghijklmnop", None) == ("", 0),
+            msg="Incorrect common head with missing string",
+        )
+
+        self.assertTrue(
+            utils.get_common_head(
+                "abcde\nfghijk\nlmnop\nqrst",
+                "abcde\nfghijk\nlmnopqr\nst",
+                delimiter="\n",
+            )
+            == ("abcde\nfghijk", 2),
+            msg="Incorrect common head of delimited strings",
+        )
+
 
 class TestW3crawl(unittest.TestCase):
     def setUp(self):
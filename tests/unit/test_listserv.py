@@ -1,8 +1,8 @@
-import os
-import tempfile
+import time
 from pathlib import Path
 from unittest import mock
 
+import pandas as pd
 import pytest
 import yaml
 
@@ -11,10 +11,54 @@ from bigbang import listserv
 from bigbang.listserv import ListservArchive, ListservList, ListservMessage
 from config.config import CONFIG
 
-dir_temp = tempfile.gettempdir()
-file_temp_mbox = dir_temp + "/listserv.mbox"
-file_auth = CONFIG.config_path + "authentication.yaml"
+file_auth = Path(CONFIG.config_path, "authentication.yaml")
 auth_key_mock = {"username": "bla", "password": "bla"}
+msg_fields = frozenset(
+    {
+        "Body",
+        "Subject",
+        "FromName",
+        "FromAddr",
+        "ToName",
+        "ToAddr",
+        "Date",
+        "ContentType",
+    }
+)
+arch_fields = msg_fields | {"ListName"}
+url_root = "https://list.example.org/cgi-bin/wa?"
+url_list = url_root + "A0=IEEE-TEST"
+# pages of a LISTSERV 16.5 list in the test data, served for the URLs
+# that contain the key
+listserv_pages = {
+    "A0=": "listserv-list.html",
+    "A1=": "listserv-period.html",
+    "A2=": "listserv-message.html",
+    "A3=": "listserv-message-body.html",
+}
+
+
+@pytest.fixture(name="requested")
+def serve_listserv_pages(monkeypatch):
+    """
+    Serve the LISTSERV pages of the test data instead of requesting them
+    from the website, and record the URLs that were requested.
+    """
+    pages = {
+        key: Path(CONFIG.test_data_path, filename).read_bytes()
+        for key, filename in listserv_pages.items()
+    }
+    requested = []
+
+    def get_website_source(url, session=None):
+        requested.append(url)
+        for key, page in pages.items():
+            if key in url:
+                return page
+        raise ConnectionError(f"{url} could not be reached")
+
+    monkeypatch.setattr(listserv, "get_website_source", get_website_source)
+    return requested
 
 
 class TestListservList:
@@ -54,23 +98,20 @@ class TestListservList:
 
     def test__to_dict(self, mlist):
         dic = mlist.to_dict()
-        assert len(list(dic.keys())) == 8
-        assert len(dic[list(dic.keys())[0]]) == 25
+        assert dic.keys() == msg_fields
+        assert len(next(iter(dic.values()))) == 25
 
     def test__to_pandas_dataframe(self, mlist):
         df = mlist.to_pandas_dataframe()
         assert len(df.columns.values) == 8
         assert len(df.index.values) == 25
 
-    def test__to_mbox(self, mlist):
-        mlist.to_mbox(dir_temp, filename=mlist.name)
-        file_temp_mbox = f"{dir_temp}/{mlist.name}.mbox"
-        f = open(file_temp_mbox, "r")
-        lines = f.readlines()
+    def test__to_mbox(self, mlist, tmp_path):
+        mlist.to_mbox(tmp_path, filename=mlist.name)
+        file_temp_mbox = tmp_path / f"{mlist.name}.mbox"
+        lines = file_temp_mbox.read_text().splitlines(keepends=True)
         assert len(lines) == 41623
         assert "What do you think of the approach?\n" in lines
-        f.close()
-        Path(file_temp_mbox).unlink()
 
 
 class TestListservArchive:
@@ -108,38 +149,221 @@ class TestListservArchive:
 
     def test__to_dict(self, arch):
         dic = arch.to_dict()
-        assert len(list(dic.keys())) == 9
-        assert len(dic[list(dic.keys())[0]]) == 82
+        assert dic.keys() == arch_fields
+        assert len(next(iter(dic.values()))) == 82
 
     def test__to_pandas_dataframe(self, arch):
         df = arch.to_pandas_dataframe()
         assert len(df.columns.values) == 9
         assert len(df.index.values) == 82
 
-    def test__to_mbox(self, arch):
-        arch.to_mbox(dir_temp)
+    def test__to_parquet(self, arch, tmp_path):
+        filepath = tmp_path / "archive.parquet"
+        arch.to_parquet(str(filepath), batch_size=10)
+        df = pd.read_parquet(filepath)
+        assert len(df.columns.values) == 9
+        assert len(df.index.values) == 82
+        assert list(df["Subject"]) == list(arch.to_dict()["Subject"])
+
+    def test__to_mbox(self, arch, tmp_path):
+        arch.to_mbox(tmp_path)
         file_dic = {
-            f"{dir_temp}/3GPP_TSG_SA_ITUT_AHG.mbox": 41623,
-            f"{dir_temp}/3GPP_TSG_SA_WG2_MTCE.mbox": 61211,
+            tmp_path / "3GPP_TSG_SA_ITUT_AHG.mbox": 41623,
+            tmp_path / "3GPP_TSG_SA_WG2_MTCE.mbox": 61211,
         }
         for filepath, line_nr in file_dic.items():
-            assert Path(filepath).is_file()
-            f = open(filepath, "r")
-            lines = f.readlines()
+            assert filepath.is_file()
+            lines = filepath.read_text().splitlines(keepends=True)
             assert line_nr == len(lines)
-            f.close()
-            Path(filepath).unlink()
+
+
+class TestListservWebsite:
+    def test__message_from_html(self):
+        source = Path(CONFIG.test_data_path, "listserv-message.html")
+        msg = ListservMessage.from_html(
+            list_name="IEEE-TEST",
+            url=url_root + "A2=ind1511d&L=IEEE-TEST&P=67",
+            source=source.read_bytes(),
+        )
+        assert msg.subject == (
+            "10th International Conference on Electrical Engineering "
+            "(ICEENG'10)"
+        )
+        assert msg.fromname == "iceeng 10"
+        assert msg.fromaddr == "[log in to unmask]"
+        assert msg.date == "Mon Nov 23 11:00:37 2015"
+        assert msg.contenttype == "multipart/mixed"
+        assert msg.body_url == (
+            url_root + "A3=ind1511d&L=IEEE-TEST&P=67&E=0&B=1&T=text%2Fplain"
+        )
+
+    def test__get_website_links(self, requested):
+        links = listserv.get_website_links(url_list)
+        assert len(links) == 6
+        assert links[-1] == (
+            "/cgi-bin/wa?SUBED1=IEEE-TEST&A=1",
+            "Subscribe or Unsubscribe",
+        )
+
+    def test__get_website_links_within(self, requested):
+        links = listserv.get_website_links(url_list, within="li")
+        assert [text for _, text in links] == [
+            "November 2015, Week 4",
+            "November 2015, Week 3",
+            "October 2014, Week 1",
+        ]
+        assert links[1][0] == "/cgi-bin/wa?A1=ind1511c&L=IEEE-TEST"
+
+    def test__get_period_urls(self, requested):
+        period_urls = ListservList.get_period_urls(
+            url_list, select={"years": 2015, "weeks": (4, 5)}
+        )
+        assert period_urls == [url_root + "A1=ind1511d&L=IEEE-TEST"]
+
+    def test__get_messages_urls(self, requested):
+        msg_urls = ListservList.get_messages_urls(
+            "IEEE-TEST", url_root + "A1=ind1511d&L=IEEE-TEST"
+        )
+        assert msg_urls == [
+            url_root + "A2=ind1511d&L=IEEE-TEST&P=67",
+            url_root + "A2=ind1511d&L=IEEE-TEST&P=68",
+        ]
+
+    def test__list_from_url(self, requested):
+        mlist = ListservList.from_url(
+            name="IEEE-TEST",
+            url=url_list,
+            select={"years": 2015, "months": "November", "weeks": 4},
+            session=mock.sentinel.session,
+        )
+        assert len(mlist) == 2
+        assert mlist.messages[1].fromname == "iceeng 10"
+        assert mlist.messages[1].body.startswith("Dear Colleagues,\n")
+        # both messages link to the same body, which is requested once
+        assert len([url for url in requested if "A3=" in url]) == 1
+
+    def test__skip_message_that_can_not_be_loaded(self, requested):
+        msg_urls = [
+            url_root + "A2=ind1511d&L=IEEE-TEST&P=67",
+            url_root + "A9=ind1511d&L=IEEE-TEST&P=0",
+        ]
+        with pytest.warns(listserv.ListservMessageWarning):
+            msgs = ListservList.get_messages_from_urls(
+                "IEEE-TEST", msg_urls, session=mock.sentinel.session
+            )
+        assert len(msgs) == 1
+
+    def test__get_pre_text_from_source(self):
+        source = Path(
+            CONFIG.test_data_path, "listserv-message-body.html"
+        ).read_bytes()
+        lines = ListservMessage.get_pre_text_from_source(source).splitlines()
+        assert lines[2] == "Call for papers: ICEENG'10 & workshops."
+        # the encoding of the page is unknown
+        source = source.replace(b"; charset=utf-8", b"")
+        assert ListservMessage.get_pre_text_from_source(source) is None
+        # the text has to be parsed
+        source = "<html><body><pre>Hi <b>all</b></pre></body></html>"
+        assert ListservMessage.get_pre_text_from_source(source) is None
+
+
+class TestResponseCache:
+    @pytest.fixture(name="cache")
+    def get_cache(self, tmp_path):
+        return listserv.ResponseCache(
+            str(tmp_path / "cache.sqlite"), expire_after=0
+        )
+
+    def test__message_page_is_kept(self, cache):
+        url = url_root + "A2=ind1511d&L=IEEE-TEST&P=67"
+        source = Path(CONFIG.test_data_path, "listserv-message.html")
+        cache.set(url, source.read_bytes())
+        assert cache.get(url) == source.read_bytes()
+
+    def test__index_page_expires(self, cache):
+        cache.set(url_list, "<html>index</html>")
+        assert cache.get(url_list) is None
+
+    def test__revalidate(self, cache):
+        cache.set(url_list, "<html>index</html>", etag='"1"')
+        assert cache.get_validators(url_list) == {"If-None-Match": '"1"'}
+        assert cache.revalidate(url_list) == "<html>index</html>"
+
+    def test__login_page_expires(self, cache):
+        # e.g. a login page served under the URL of a message
+        url = url_root + "A2=ind1511d&L=IEEE-TEST&P=67"
+        cache.set(url, "<html><form>Log in</form></html>")
+        assert cache.get(url) is None
+
+    def test__session_pages_are_not_cached(self, cache, monkeypatch):
+        session = mock.Mock()
+        session.get.return_value = mock.Mock(
+            status_code=200,
+            content=b"<html>index</html>",
+            text="<html>index</html>",
+            headers={},
+        )
+        monkeypatch.setattr(listserv, "RESPONSE_CACHE", cache)
+        monkeypatch.setattr(listserv, "RATE_LIMITER", None)
+        cache.expire_after = 60
+        listserv.get_website_source(url_list, session=session)
+        assert session.get.called
+        assert cache.get(url_list) is None
+
+    def test__http_session_pages_are_cached(self, cache, monkeypatch):
+        session = mock.Mock()
+        session.get.return_value = mock.Mock(
+            status_code=200,
+            content=b"<html>index</html>",
+            text="<html>index</html>",
+            headers={},
+        )
+        monkeypatch.setattr(listserv, "RESPONSE_CACHE", cache)
+        monkeypatch.setattr(listserv, "RATE_LIMITER", None)
+        monkeypatch.setattr(listserv, "HTTP_SESSION", session)
+        cache.expire_after = 60
+        listserv.get_website_source(url_list, session=session)
+        assert cache.get(url_list) == "<html>index</html>"
+
+
+def test__rate_limiter():
+    limiter = listserv.RateLimiter(rate=100)
+    start = time.monotonic()
+    for _ in range(5):
+        limiter.wait()
+    assert time.monotonic() - start >= 0.04
+
+
+def test__website_source_is_rate_limited(tmp_path, monkeypatch):
+    response = mock.Mock(
+        status_code=200,
+        content=b"<html>index</html>",
+        text="<html>index</html>",
+        headers={},
+    )
+    limiter = mock.Mock()
+    monkeypatch.setattr(
+        listserv,
+        "RESPONSE_CACHE",
+        listserv.ResponseCache(str(tmp_path / "cache.sqlite")),
+    )
+    monkeypatch.setattr(listserv, "RATE_LIMITER", limiter)
+    monkeypatch.setattr(
+        listserv, "HTTP_SESSION", mock.Mock(get=lambda *a, **k: response)
+    )
+    listserv.get_website_source(url_list)
+    # the second request is answered by the cache, without waiting
+    listserv.get_website_source(url_list)
+    assert limiter.wait.call_count == 1
 
 
 @mock.patch("bigbang.listserv.ask_for_input", return_value="check")
-def test__get_login_from_terminal(input):
+def test__get_login_from_terminal(input, tmp_path):
     """ test if login keys will be documented """
-    file_auth = dir_temp + "/authentication.yaml"
+    file_auth = tmp_path / "authentication.yaml"
     _, _ = listserv.get_login_from_terminal(
         username=None, password=None, file_auth=file_auth
     )
-    f = open(file_auth, "r")
-    lines = f.readlines()
-    assert lines[0].strip("\n") == "username: 'check'"
-    assert lines[1].strip("\n") == "password: 'check'"
-    os.remove(file_auth)
+    lines = file_auth.read_text().splitlines()
+    assert lines[0] == "username: 'check'"
+    assert lines[1] == "password: 'check'"
@@ -1,6 +1,5 @@
 from time import time
-import os
-import tempfile
+import functools
 from pathlib import Path
 from unittest import mock
 
@@ -12,23 +11,114 @@ from bigbang import listserv
 from bigbang.listserv import ListservArchive, ListservList, ListservMessage
 from config.config import CONFIG
 
-dir_temp = tempfile.gettempdir()
 url_archive = "https://listserv.ieee.org/cgi-bin/wa?"
 url_list = url_archive + "A0=IEEE-TEST"
 url_message = url_archive + "A2=ind1511d&L=IEEE-TEST&P=67"
-file_temp_mbox = dir_temp + "/listserv.mbox"
-file_auth = CONFIG.config_path + "authentication.yaml"
+file_auth = Path(CONFIG.config_path, "authentication.yaml")
 auth_key_mock = {"username": "bla", "password": "bla"}
+file_responses = Path(CONFIG.test_data_path, "listserv_responses.sqlite")
+msg_fields = frozenset(
+    {
+        "Body",
+        "Subject",
+        "FromName",
+        "FromAddr",
+        "ToName",
+        "ToAddr",
+        "Date",
+        "ContentType",
+    }
+)
+arch_fields = msg_fields | {"ListName"}
+
+pytestmark = pytest.mark.network
+
+
+@functools.lru_cache(maxsize=8)
+def load_auth_key(filepath: Path, mtime: float) -> dict:
+    """ parse the login keys once per version of the file """
+    with open(filepath, "r") as stream:
+        # the libyaml parser, if PyYAML was built with it
+        loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+        return yaml.load(stream, Loader=loader)
+
+
+@pytest.fixture(scope="session", autouse=True)
+def replay_responses():
+    """
+    Record the pages requested by these tests on the first run and replay
+    them on all later runs, without network access.
+    """
+    response_cache = listserv.RESPONSE_CACHE
+    listserv.RESPONSE_CACHE = listserv.ResponseCache(
+        file_responses, expire_after=float("inf")
+    )
+    yield
+    listserv.RESPONSE_CACHE = response_cache
+
+
+@pytest.fixture(name="session", scope="session")
+def get_session():
+    """
+    The test list is public, so there is no need to log in. The shared
+    session without a login keeps the pages in RESPONSE_CACHE.
+    """
+    return listserv.HTTP_SESSION
+
+
+# parsed once and shared by all tests that read the same pages
+@pytest.fixture(name="msg", scope="session")
+def get_message(session):
+    msg = ListservMessage.from_url(
+        list_name="IEEE-TEST",
+        url=url_message,
+        fields="total",
+        session=session,
+    )
+    return msg
+
+
+@pytest.fixture(name="mlist", scope="session")
+def get_mailinglist(session):
+    mlist = ListservList.from_url(
+        name="IEEE-TEST",
+        url=url_list,
+        select={
+            "years": 2015,
+            "fields": "header",
+        },
+        session=session,
+    )
+    return mlist
+
+
+@pytest.fixture(name="arch", scope="session")
+def get_mailarchive(session):
+    start = time()
+    arch = ListservArchive.from_url(
+        name="IEEE",
+        url_root=url_archive,
+        url_home=url_archive + "HOME",
+        select={
+            "years": 2015,
+            "months": "November",
+            "weeks": 4,
+            "fields": "header",
+        },
+        session=session,
+        instant_save=False,
+        only_mlist_urls=False,
+    )
+    return arch
 
 
 class TestListservMessage:
     @pytest.mark.skipif(
-        not os.path.isfile(file_auth),
+        not file_auth.is_file(),
         reason="Key to log into LISTSERV could not be found",
     )
     def test__from_url_with_login(self):
-        with open(file_auth, "r") as stream:
-            auth_key = yaml.safe_load(stream)
+        auth_key = load_auth_key(file_auth, file_auth.stat().st_mtime)
         msg = ListservMessage.from_url(
             list_name="IEEE-TEST",
             url=url_message,
@@ -38,16 +128,6 @@ class TestListservMessage:
         assert msg.fromaddr == "[log in to unmask]"
         assert msg.toaddr == None
 
-    @pytest.fixture(name="msg", scope="module")
-    def get_message(self):
-        msg = ListservMessage.from_url(
-            list_name="IEEE-TEST",
-            url=url_message,
-            fields="total",
-            login=auth_key_mock,
-        )
-        return msg
-
     def test__message_content(self, msg):
         assert msg.body.split("C")[0] == "=================================================\n"
         assert msg.subject == "10th International Conference on Electrical Engineering (ICEENG'10)"
@@ -58,48 +138,45 @@ class TestListservMessage:
         assert msg.date == "Mon Nov 23 11:00:37 2015"
         assert msg.contenttype == "multipart/mixed"
 
-    def test__only_header_from_url(self):
+    def test__only_header_from_url(self, session):
         msg = ListservMessage.from_url(
             list_name="IEEE-TEST",
             url=url_message,
             fields="header",
-            login=auth_key_mock,
+            session=session,
         )
         assert msg.body is None
 
-    def test__only_body_from_url(self):
+    def test__only_body_from_url(self, session):
         msg = ListservMessage.from_url(
             list_name="IEEE-TEST",
             url=url_message,
             fields="body",
-            login=auth_key_mock,
+            session=session,
         )
         assert msg.subject is None
 
     def test__to_dict(self, msg):
         dic = msg.to_dict()
-        assert len(list(dic.keys())) == 8
+        assert dic.keys() == msg_fields
 
-    def test__to_mbox(self, msg):
+    def test__to_mbox(self, msg, tmp_path):
+        file_temp_mbox = tmp_path / "listserv.mbox"
         msg.to_mbox(file_temp_mbox)
-        f = open(file_temp_mbox, "r")
-        lines = f.readlines()
+        lines = file_temp_mbox.read_text().splitlines(keepends=True)
         assert len(lines) == 57
         assert (
             lines[1] == "From b'[log in to unmask]' Mon Nov 23 11:00:37 2015\n"
         )
-        f.close()
-        Path(file_temp_mbox).unlink()
 
 
 class TestListservList:
     @pytest.mark.skipif(
-        not os.path.isfile(file_auth),
+        not file_auth.is_file(),
         reason="Key to log into LISTSERV could not be found",
     )
     def test__from_url_with_login(self):
-        with open(file_auth, "r") as stream:
-            auth_key = yaml.safe_load(stream)
+        auth_key = load_auth_key(file_auth, file_auth.stat().st_mtime)
         mlist = ListservList.from_url(
             name="IEEE-TEST",
             url=url_list,
@@ -114,19 +191,6 @@ class TestListservList:
         assert mlist.messages[0].fromaddr == "[log in to unmask]"
         assert mlist.messages[0].toaddr == None
 
-    @pytest.fixture(name="mlist", scope="module")
-    def get_mailinglist(self):
-        mlist = ListservList.from_url(
-            name="IEEE-TEST",
-            url=url_list,
-            select={
-                "years": 2015,
-                "fields": "header",
-            },
-            login=auth_key_mock,
-        )
-        return mlist
-
     def test__mailinglist_content(self, mlist):
         assert mlist.name == "IEEE-TEST"
         assert mlist.source == url_list
@@ -135,48 +199,26 @@ class TestListservList:
 
     def test__to_dict(self, mlist):
         dic = mlist.to_dict()
-        assert len(list(dic.keys())) == 8
-        assert len(dic[list(dic.keys())[0]]) == 1
+        assert dic.keys() == msg_fields
+        assert len(next(iter(dic.values()))) == 1
 
     def test__to_pandas_dataframe(self, mlist):
         df = mlist.to_pandas_dataframe()
         assert len(df.columns.values) == 8
         assert len(df.index.values) == 1
 
-    def test__to_mbox(self, mlist):
-        mlist.to_mbox(dir_temp, filename=mlist.name)
-        file_temp_mbox = f"{dir_temp}/{mlist.name}.mbox"
-        f = open(file_temp_mbox, "r")
-        lines = f.readlines()
+    def test__to_mbox(self, mlist, tmp_path):
+        mlist.to_mbox(tmp_path, filename=mlist.name)
+        file_temp_mbox = tmp_path / f"{mlist.name}.mbox"
+        lines = file_temp_mbox.read_text().splitlines(keepends=True)
         assert len(lines) == 10
         assert (
             lines[1]
             == "From b'[log in to unmask]' Mon Nov 23 11:00:37 2015\n"
         )
-        f.close()
-        Path(file_temp_mbox).unlink()
 
 
 class TestListservArchive:
-    @pytest.fixture(name="arch", scope="session")
-    def get_mailarchive(self):
-        start = time()
-        arch = ListservArchive.from_url(
-            name="IEEE",
-            url_root=url_archive,
-            url_home=url_archive + "HOME",
-            select={
-                "years": 2015,
-                "months": "November",
-                "weeks": 4,
-                "fields": "header",
-            },
-            login=auth_key_mock,
-            instant_save=False,
-            only_mlist_urls=False,
-        )
-        return arch
-
     def test__archive_content(self, arch):
         mlist_names = [mlist.name for mlist in arch.lists]
         mlist_len = [len(mlist) for mlist in arch.lists]
@@ -188,37 +230,32 @@ class TestListservArchive:
 
     def test__to_dict(self, arch):
         dic = arch.to_dict()
-        assert len(list(dic.keys())) == 9
-        assert len(dic[list(dic.keys())[0]]) == 1
+        assert dic.keys() == arch_fields
+        assert len(next(iter(dic.values()))) == 1
 
     def test__to_pandas_dataframe(self, arch):
         df = arch.to_pandas_dataframe()
         assert len(df.columns.values) == 9
         assert len(df.index.values) == 1
 
-    def test__to_mbox(self, arch):
-        arch.to_mbox(dir_temp)
+    def test__to_mbox(self, arch, tmp_path):
+        arch.to_mbox(tmp_path)
         file_dic = {
-            f"{dir_temp}/IEEE-TEST.mbox": 10,
+            tmp_path / "IEEE-TEST.mbox": 10,
         }
         for filepath, line_nr in file_dic.items():
-            assert Path(filepath).is_file()
-            f = open(filepath, "r")
-            lines = f.readlines()
+            assert filepath.is_file()
+            lines = filepath.read_text().splitlines(keepends=True)
             assert line_nr == len(lines)
-            f.close()
-            Path(filepath).unlink()
 
 
 @mock.patch("bigbang.listserv.ask_for_input", return_value="check")
-def test__get_login_from_terminal(input):
+def test__get_login_from_terminal(input, tmp_path):
     """ test if login keys will be documented """
-    file_auth = dir_temp + "/authentication.yaml"
+    file_auth = tmp_path / "authentication.yaml"
     _, _ = listserv.get_login_from_terminal(
         username=None, password=None, file_auth=file_auth
     )
-    f = open(file_auth, "r")
-    lines = f.readlines()
-    assert lines[0].strip("\n") == "username: 'check'"
-    assert lines[1].strip("\n") == "password: 'check'"
-    os.remove(file_auth)
+    lines = file_auth.read_text().splitlines()
+    assert lines[0] == "username: 'check'"
+    assert lines[1] == "password: 'check'"